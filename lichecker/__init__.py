@@ -1,83 +1,387 @@
+import hashlib
+import itertools
+import json
+import os
+import queue
+import re
+import sqlite3
 import subprocess
+import site
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, nullcontext, suppress
+from importlib.metadata import distributions
+from threading import Lock
 
+from packaging.utils import canonicalize_name
+
+from lichecker import metadata
 from lichecker.exception import NoDerivativesException, BadLicense, AmbiguousLicense, \
     UnidirectionalCodeFlow, SoftwareSpecific, UnknownLicense, InconsistentLicense, PythonLinkingException
 
 
+# Trove license classifiers mapped to SPDX identifiers
+_TROVE_LICENSES = {
+    "License :: OSI Approved :: MIT License": "MIT",
+    "License :: OSI Approved :: Apache Software License": "Apache-2.0",
+    "License :: OSI Approved :: BSD License": "BSD",
+    "License :: OSI Approved :: ISC License (ISCL)": "ISC",
+    "License :: OSI Approved :: Python Software Foundation License": "PSF",
+    "License :: OSI Approved :: Zope Public License": "ZPL",
+    "License :: OSI Approved :: Historical Permission Notice and Disclaimer (HPND)": "HPND",
+    "License :: OSI Approved :: Mozilla Public License 2.0 (MPL 2.0)": "MPL-2.0",
+    "License :: OSI Approved :: Mozilla Public License 1.1 (MPL 1.1)": "MPL-1.1",
+    "License :: OSI Approved :: The Unlicense (Unlicense)": "Unlicense",
+    "License :: OSI Approved :: GNU General Public License (GPL)": "GPL",
+    "License :: OSI Approved :: GNU General Public License v2 (GPLv2)": "GPL-2.0",
+    "License :: OSI Approved :: GNU General Public License v2 or later (GPLv2+)": "GPL-2.0-or-later",
+    "License :: OSI Approved :: GNU General Public License v3 (GPLv3)": "GPL-3.0",
+    "License :: OSI Approved :: GNU General Public License v3 or later (GPLv3+)": "GPL-3.0-or-later",
+    "License :: OSI Approved :: GNU Affero General Public License v3": "AGPL-3.0",
+    "License :: OSI Approved :: GNU Affero General Public License v3 or later (AGPLv3+)": "AGPL-3.0-or-later",
+    "License :: OSI Approved :: GNU Lesser General Public License v2 (LGPLv2)": "LGPL-2.0",
+    "License :: OSI Approved :: GNU Lesser General Public License v2 or later (LGPLv2+)": "LGPL-2.0-or-later",
+    "License :: OSI Approved :: GNU Lesser General Public License v3 (LGPLv3)": "LGPL-3.0",
+    "License :: OSI Approved :: GNU Lesser General Public License v3 or later (LGPLv3+)": "LGPL-3.0-or-later",
+    "License :: OSI Approved :: GNU Library or Lesser General Public License (LGPL)": "LGPL",
+    "License :: OSI Approved :: Eclipse Public License 2.0 (EPL-2.0)": "EPL-2.0",
+    "License :: OSI Approved :: European Union Public Licence 1.2 (EUPL 1.2)": "EUPL-1.2",
+    "License :: OSI Approved :: Boost Software License 1.0 (BSL-1.0)": "BSL-1.0",
+    "License :: Public Domain": "Public Domain",
+}
+# exact spellings seen in package metadata, checked before any fuzzy matching
+_SPDX_ALIASES = {
+    **_TROVE_LICENSES,
+    # packages often use the last segment of the classifier as their license
+    **{k.rsplit(" :: ", 1)[-1]: v for k, v in _TROVE_LICENSES.items()},
+    "MIT": "MIT",
+    "MIT license": "MIT",
+    "The MIT License": "MIT",
+    "Apache 2.0": "Apache-2.0",
+    "Apache-2.0": "Apache-2.0",
+    "Apache License 2.0": "Apache-2.0",
+    "Apache License, Version 2.0": "Apache-2.0",
+    "Apache Software License 2.0": "Apache-2.0",
+    "BSD": "BSD",
+    "BSD-2-Clause": "BSD",
+    "BSD-3-Clause": "BSD",
+    "BSD 3-Clause License": "BSD",
+    "new BSD License": "BSD",
+    "ISC": "ISC",
+    "ISC license": "ISC",
+    "PSF": "PSF",
+    "PSF License": "PSF",
+    "MPL-2.0": "MPL-2.0",
+    "MPL 2.0": "MPL-2.0",
+    "LGPL": "LGPL",
+    "GPL": "GPL",
+    "GPLv2": "GPL-2.0",
+    "GPLv3": "GPL-3.0",
+    "Unlicense": "Unlicense",
+    "Public Domain": "Public Domain",
+}
+
+
 class DependencyChecker:
     cache = {}
+    _cache_lock = Lock()
+    _inflight = {}  # package name -> Future of a lookup in progress
+    _primed = False
+    # interpreter whose environment is inspected, None for the running one
+    python = None
+    max_workers = 4  # only used when python is set
+    _idle_workers = queue.Queue()
+    _worker_count = 0
+    _bulk_loaded = False
+    _worker_lock = Lock()
+    # metadata is persisted between runs, set to None to disable
+    disk_cache = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                              "lichecker", "metadata.sqlite")
 
     def __init__(self, pkg_name):
+        if self.python != DependencyChecker.python:
+            raise ValueError("set DependencyChecker.python, subclasses and instances can not override it")
         self.pkg_name = pkg_name
-        self._transient_dependencies = {}
-        self._data = {}
+        self._transient_dependencies = None
+        self._resolved = None
+        self._data = None
         self._deps = []
+        self._versions = None
+        self._licenses = None
+
+    def _load(self):
+        if self._data is None:
+            self._data = self.get_package_data(self.pkg_name)
+            self._deps = [dep for dep in self._parse_requires(self._data.get('Requires'))
+                          if dep != canonicalize_name(self.pkg_name)]
+        return self._data
 
     @property
     def license(self):
-        if not self._data:
-            self._data = self.get_package_data(self.pkg_name)
-        return self._data.get("License")
+        return self._load().get("License")
 
     @property
     def version(self):
-        if not self._data:
-            self._data = self.get_package_data(self.pkg_name)
-        return self._data.get("Version")
+        return self._load().get("Version")
 
     @property
     def dependencies(self):
-        if not self._deps:
-            r = self.get_package_data(self.pkg_name).get('Requires')
-            r = r.split(", ") if r else []
-            self._deps = [dep for dep in r if dep and dep != self.pkg_name]
+        self._load()
         return self._deps
 
     @property
     def transient_dependencies(self):
-        all_deps = list(self._transient_dependencies.keys())
-        new_deps = [k for k in self.dependencies if k not in all_deps]
-        while new_deps:
-            for dep in new_deps:
-                self._transient_dependencies[dep] = self.get_direct_dependencies(dep)
-            new_deps = []
-            for p, deps in self._transient_dependencies.items():
-                new_deps += [d for d in deps if d not in self._transient_dependencies]
-            #   print("### ", p, deps)
+        if self._transient_dependencies is None:
+            self._transient_dependencies = {p: data["Requires"] for p, data in self._resolve_all().items()}
         return self._transient_dependencies
 
+    def _resolve_all(self):
+        """ walk the dependency tree once, collecting everything the properties need for each package """
+        if self._resolved is None:
+            self._resolved = dict(self._walk())
+        return self._resolved
+
+    def _walk(self, prune=()):
+        """ yield (package, data) for every transient dependency in breadth first order, as soon as it is resolved
+
+        dependencies of packages in prune are not followed, unless they are also required by another package
+        """
+        visited = set()
+        pending = deque()
+
+        def enqueue(pkgs):
+            for pkg in pkgs:
+                if pkg not in visited:
+                    visited.add(pkg)
+                    pending.append(pkg)
+
+        enqueue(self.dependencies)
+        # a resolved tree is walked again without lookups, only the pruning differs
+        resolve = self._resolved.__getitem__ if self._resolved is not None else self._resolve_package
+        threaded = DependencyChecker.python and self._resolved is None
+        with ThreadPoolExecutor(max_workers=self.max_workers) if threaded else nullcontext() as executor:
+            lookup = executor.map if executor else map
+            while pending:
+                level = [pending.popleft() for _ in range(len(pending))]
+                for dep, data in zip(level, lookup(resolve, level)):
+                    yield dep, data
+                    if dep not in prune:
+                        enqueue(data["Requires"])
+
+    @staticmethod
+    def _resolve_package(pkg_name):
+        data = DependencyChecker.get_package_data(pkg_name)
+        return {"License": data.get("License"),
+                "Version": data.get("Version"),
+                "Requires": DependencyChecker._parse_requires(data.get("Requires"))}
+
+    @staticmethod
+    def _site_key():
+        """ changes whenever a package is installed, upgraded or removed anywhere in sys.path, or the record format changes
+
+        covers user site, PYTHONPATH and .pth entries, not the metadata of editable installs updated in place
+        """
+        paths = list(sys.path)
+        user_site = site.getusersitepackages()
+        if user_site not in paths:
+            paths.append(user_site)
+        state = [metadata.FORMAT]
+        for p in paths:
+            try:
+                state.append((p, os.stat(p).st_mtime))
+            except OSError:
+                state.append((p, None))
+        return hashlib.sha1(json.dumps(state).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _load_disk_cache(cls, site_key):
+        if not cls.disk_cache or not os.path.isfile(cls.disk_cache):
+            return {}
+        try:
+            with closing(sqlite3.connect(cls.disk_cache)) as db:
+                rows = db.execute("SELECT pkg, data FROM snapshot WHERE env = ? AND site = ?",
+                                  (sys.executable, site_key)).fetchall()
+        except sqlite3.Error:
+            return {}
+        return {pkg: json.loads(data) for pkg, data in rows}
+
+    @classmethod
+    def _save_disk_cache(cls, site_key, entries):
+        if not cls.disk_cache:
+            return
+        try:
+            os.makedirs(os.path.dirname(cls.disk_cache), exist_ok=True)
+            with closing(sqlite3.connect(cls.disk_cache)) as db, db:
+                db.execute("CREATE TABLE IF NOT EXISTS snapshot "
+                           "(env TEXT, pkg TEXT, site TEXT, data BLOB, PRIMARY KEY (env, pkg))")
+                db.execute("DELETE FROM snapshot WHERE env = ?", (sys.executable,))
+                db.executemany("INSERT INTO snapshot VALUES (?, ?, ?, ?)",
+                               [(sys.executable, pkg, site_key, json.dumps(data))
+                                for pkg, data in entries.items()])
+        except (OSError, sqlite3.Error):
+            pass  # the cache is an optimization only, never fail because of it
+
+    @classmethod
+    def _prime_cache(cls):
+        """ read metadata of every installed distribution in one sweep over sys.path """
+        with cls._cache_lock:
+            if cls._primed:
+                return
+            site_key = cls._site_key()
+            entries = cls._load_disk_cache(site_key)
+            if not entries:
+                for dist in distributions():
+                    name = dist.metadata["Name"]
+                    if not name:
+                        continue
+                    name = canonicalize_name(name)
+                    # same precedence as importlib.metadata.distribution, first match in sys.path wins
+                    if name not in entries:
+                        entries[name] = metadata.dist_data(dist)
+                cls._save_disk_cache(site_key, entries)
+            for name, data in entries.items():
+                cls.cache.setdefault(name, data)
+            cls._primed = True
+
+    @classmethod
+    def _acquire_worker(cls):
+        """ an idle metadata worker running under cls.python, up to max_workers are spawned on demand """
+        while True:
+            with cls._worker_lock:
+                spawn = cls._idle_workers.empty() and cls._worker_count < cls.max_workers
+                if spawn:
+                    cls._worker_count += 1
+            if spawn:
+                break
+            worker = cls._idle_workers.get()
+            if worker is not None:
+                return worker
+            # None is put when a worker dies, its slot is free again
+        try:
+            return subprocess.Popen([cls.python, metadata.__file__], text=True,
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError:
+            cls._release_worker_slot()
+            raise
+
+    @classmethod
+    def _release_worker_slot(cls):
+        with cls._worker_lock:
+            cls._worker_count -= 1
+        cls._idle_workers.put(None)
+
+    @classmethod
+    def _query_worker(cls, pkg_name):
+        """ ask one of the long lived metadata workers, each handles one request at a time """
+        worker = cls._acquire_worker()
+        try:
+            worker.stdin.write(pkg_name + "\n")
+            worker.stdin.flush()
+            line = worker.stdout.readline()
+        except OSError:
+            line = ""
+        if not line:
+            worker.kill()
+            worker.wait()
+            worker.stdout.close()
+            with suppress(OSError):
+                worker.stdin.close()  # pending input can not be flushed to a dead process
+            cls._release_worker_slot()
+            raise RuntimeError(f"metadata worker for {cls.python} exited unexpectedly")
+        cls._idle_workers.put(worker)
+        return json.loads(line)
+
+    @classmethod
+    def _bulk_load(cls):
+        """ snapshot every package installed for cls.python with a single pip inspect call, needs pip >= 22.2 """
+        with cls._cache_lock:
+            if cls._bulk_loaded:
+                return
+            cls._bulk_loaded = True
+            try:
+                out = subprocess.check_output([cls.python, "-m", "pip", "inspect", "--local"],
+                                              stderr=subprocess.DEVNULL)
+                report = json.loads(out)
+            except (OSError, subprocess.CalledProcessError, ValueError):
+                return  # pip < 22.2, every package goes through the worker
+            environment = report.get("environment")
+            for pkg in report.get("installed", []):
+                md = pkg.get("metadata", {})
+                if not md.get("name"):
+                    continue
+                data = metadata.summary(md["name"], md.get("version"), md.get("license"),
+                                        md.get("requires_dist"), environment)
+                cls.cache.setdefault(canonicalize_name(md["name"]), data)
+
+    @classmethod
+    def _fetch_once(cls, pkg_name, fetch):
+        """ run fetch(pkg_name) and cache the result, concurrent requests for the same package wait for that call """
+        with cls._cache_lock:
+            if pkg_name in cls.cache:
+                return cls.cache[pkg_name]
+            future = cls._inflight.get(pkg_name)
+            owner = future is None
+            if owner:
+                future = cls._inflight[pkg_name] = Future()
+        if not owner:
+            return future.result()
+        try:
+            data = fetch(pkg_name)
+        except BaseException as e:
+            with cls._cache_lock:
+                cls._inflight.pop(pkg_name)
+            future.set_exception(e)
+            raise
+        with cls._cache_lock:
+            cls.cache[pkg_name] = data
+            cls._inflight.pop(pkg_name)
+        future.set_result(data)
+        return data
+
     @staticmethod
     def get_package_data(pkg_name, cache=True):
-        pkg_name = pkg_name.strip().replace("_", "-")  # pip normalizes this internally, removes duplicate entries since packages can use either
-        if cache and DependencyChecker.cache.get(pkg_name):
+        pkg_name = canonicalize_name(pkg_name.strip())  # PEP 503, removes duplicate entries since packages can use either
+        if cache and pkg_name in DependencyChecker.cache:
             return DependencyChecker.cache[pkg_name]
-        out = subprocess.check_output(["pip", "show", pkg_name]).decode("utf-8")
-        lines = [l.split(": ") for l in out.split("\n") if ": " in l]
-        lines = [l for l in lines if len(l) == 2] # TODO debug when != 2
-        data = {k: v for k, v in lines if v}
-        if cache and data:
-            DependencyChecker.cache[pkg_name] = data
-        return data
+        if DependencyChecker.python:
+            if not cache:
+                return DependencyChecker._query_worker(pkg_name)
+            if not DependencyChecker._bulk_loaded:
+                DependencyChecker._bulk_load()
+            return DependencyChecker._fetch_once(pkg_name, DependencyChecker._query_worker)
+        if cache:
+            if not DependencyChecker._primed:
+                DependencyChecker._prime_cache()
+            return DependencyChecker.cache.get(pkg_name) or {}
+        return metadata.package_data(pkg_name)
 
     @staticmethod
     def get_license(pkg_name):
         return DependencyChecker.get_package_data(pkg_name).get("License")
 
+    @staticmethod
+    def _parse_requires(r):
+        """ split a pip show style "Requires" value in a single pass """
+        return [canonicalize_name(dep) for dep in map(str.strip, r.split(",")) if dep] if r else []
+
     @staticmethod
     def get_direct_dependencies(pkg_name):
         # print("# parsing", pkg_name)
         r = DependencyChecker.get_package_data(pkg_name).get('Requires')
-        return r.split(", ") if r else []
+        return DependencyChecker._parse_requires(r)
 
     @property
     def versions(self):
-        return {p: self.get_package_data(p).get("Version")
-                for p in self.transient_dependencies}
+        if self._versions is None:
+            self._versions = {p: data["Version"] for p, data in self._resolve_all().items()}
+        return self._versions
 
     @property
     def licenses(self):
-        return {p: self.get_package_data(p).get("License") or "UNKNOWN"
-                for p in self.transient_dependencies}
+        if self._licenses is None:
+            self._licenses = {p: data["License"] or "UNKNOWN" for p, data in self._resolve_all().items()}
+        return self._licenses
 
 
 class LicenseChecker(DependencyChecker):
@@ -85,15 +389,44 @@ class LicenseChecker(DependencyChecker):
         'ASL 2.0': 'Apache-2.0',
         "Historical Permission Notice and Disclaimer": "HPND"
     }
+    # single pass classification, lgpl is listed before gpl so it wins when both match at the same position
+    _LICENSE_RE = re.compile(r"(?P<lesser_gnu>lesser gnu public)|(?P<lgpl>lgpl)|(?P<gnu>gnu public)|(?P<gpl>gpl)|"
+                             r"(?P<unlicense>unlicense)|(?P<public_domain>public domain)|(?P<bsd>bsd)|"
+                             r"(?P<apache>apache)|(?P<mit>mit)|(?P<zpl>(?-i:^ZPL))|(?P<psf>python)", re.I)
+    # normalized name per category, in order of precedence
+    _CATEGORY_NAMES = {
+        "bsd": "BSD",
+        "apache": "Apache-2.0",
+        "mit": "MIT",
+        "zpl": "ZPL",
+        "lesser_gnu": "LGPL",
+        "gnu": "GPL",
+        "psf": "PSF"
+    }
+    # licenses accepted without any allow_* flag
+    _VALID = frozenset({"mit", "apache-2.0", "mpl-2.0", "isc", "bsd", "psf", "zpl", "hpnd"})
+    # categories that need an explicit decision, in order of precedence
+    _RESTRICTED = ("lgpl", "gpl", "unlicense", "public_domain")
+    _ERRORS = {
+        "lgpl": (PythonLinkingException,
+                 "{pkg} is licensed under {li} which has unclear implications in the python world"),
+        "gpl": (UnidirectionalCodeFlow,
+                "{pkg} is licensed under {li} which places restrictions in larger works"),
+        "unlicense": (InconsistentLicense,
+                      "Unlicense is not global. It doesn't make sense in some jurisdictions.\n"
+                      "It's inconsistent. Some of the warranty terms cannot, logically, co-exist.\n"
+                      "The license is short, clearly expressing intent, at the cost of not carefully addressing common license, copy-right and warranty issues."),
+        "public_domain": (BadLicense, "Public domain dedications are not licenses"),
+        "unknown": (UnknownLicense, "{pkg} license unknown, no permissions given")
+    }
 
     def __init__(self, pkg_name, license_overrides=None, whitelisted_packages=None,
                  allow_nonfree=False, allow_viral=False, allow_unknown=False,
                  allow_unlicense=False, allow_lgpl=False, allow_ambiguous=False, allow_public_domain=True):
         super().__init__(pkg_name)
-        license_overrides = license_overrides or {}
-        self._license_overrides = {k.lower(): v for k ,v in license_overrides.items()}
+        self.license_overrides = license_overrides or {}
         whitelist = whitelisted_packages or []
-        self._whitelist = [p.lower() for p in whitelist]
+        self._whitelist = {canonicalize_name(p) for p in whitelist}
         self.allow_nonfree = allow_nonfree
         self.allow_viral = allow_viral
         self.allow_unknown = allow_unknown
@@ -102,63 +435,92 @@ class LicenseChecker(DependencyChecker):
         self.allow_ambiguous = allow_ambiguous
         self.allow_public_domain = allow_public_domain
 
+    @staticmethod
+    def license_categories(li):
+        return {m.lastgroup for m in LicenseChecker._LICENSE_RE.finditer(li)}
+
     @staticmethod
     def normalize_license_name(li):
         li = li.strip()
         if li in LicenseChecker.ALIASES:
             return LicenseChecker.ALIASES[li]
+        if li in _SPDX_ALIASES:
+            return _SPDX_ALIASES[li]
         if li.lower().endswith(" license"):
             li = li[:-7].strip()
-        if "bsd" in li.lower():
-            return 'BSD'
-        if "apache" in li.lower():
-            return 'Apache-2.0'
-        if "mit" in li.lower():
-            return "MIT"
-        if li.startswith("ZPL"):
-            return 'ZPL'
-        if "lesser gnu public license" in li.lower():
-            return "LGPL"
-        if "gnu public license" in li.lower():
-            return "GPL"
-        if "python" in li.lower():
-            return "PSF"
+        categories = LicenseChecker.license_categories(li)
+        for category, name in LicenseChecker._CATEGORY_NAMES.items():
+            if category in categories:
+                return name
         return LicenseChecker.ALIASES.get(li) or li
 
+    @staticmethod
+    def classify_license(li):
+        """ returns the normalized lower case license name and the category deciding how it is validated """
+        li = LicenseChecker.normalize_license_name(li or "UNKNOWN")
+        categories = LicenseChecker.license_categories(li)
+        li = li.lower()
+        for category in LicenseChecker._RESTRICTED:
+            if category in categories:
+                return li, category
+        return li, "valid" if li in LicenseChecker._VALID else "unknown"
+
     @property
     def license(self):
-        return self._license_overrides.get(self.pkg_name.lower()) \
+        return self._license_overrides.get(canonicalize_name(self.pkg_name)) \
                or super().license
 
+    @property
+    def license_overrides(self):
+        return self._license_overrides
+
+    @license_overrides.setter
+    def license_overrides(self, license_overrides):
+        self._license_overrides = {canonicalize_name(k): v for k, v in license_overrides.items()}
+        self._resolved = None
+        self._transient_dependencies = None
+        self._versions = None
+        self._licenses = None
+
+    def _resolve_package(self, pkg_name):
+        if pkg_name in self._whitelist and pkg_name in self._license_overrides:
+            # its license is given and its subtree is trusted
+            if DependencyChecker.python and pkg_name not in DependencyChecker.cache:
+                data = {}
+            else:
+                data = self.get_package_data(pkg_name)
+            return {"License": self._license_overrides[pkg_name], "Version": data.get("Version"), "Requires": []}
+        return super()._resolve_package(pkg_name)
+
     @property
     def licenses(self):
-        return {p.lower(): self._license_overrides.get(p.lower())
-                           or self.get_package_data(p).get("License")
-                for p in self.transient_dependencies}
+        if self._licenses is None:
+            self._licenses = {p: self._license_overrides.get(p) or data["License"]
+                              for p, data in self._resolve_all().items()}
+        return self._licenses
 
     def validate(self):
-        valid = ["mit", 'apache-2.0', 'unlicense', 'mpl-2.0', 'isc', 'bsd', 'psf', 'zpl', "hpnd"]
-        pkgs = [(self.pkg_name.lower(), self.license)] + \
-               [(pkg.lower(), li) for pkg, li in self.licenses.items()]
+        allowed = {
+            "lgpl": self.allow_lgpl,
+            "gpl": self.allow_viral,
+            "unlicense": self.allow_unlicense,
+            "public_domain": self.allow_public_domain,
+            "unknown": self.allow_nonfree or self.allow_unknown,
+            "valid": True
+        }
+        # whitelisted packages are trusted with their whole subtree, their dependencies are never walked
+        root = canonicalize_name(self.pkg_name)
+        deps = self._walk(prune=self._whitelist)
+        pkgs = itertools.chain([(root, self.license)],
+                               ((p, self._license_overrides.get(p) or data["License"]) for p, data in deps))
         for pkg, li in pkgs:
             if pkg in self._whitelist:
                 print(f"{pkg} explicitly allowed, skipping license check")
                 continue
-            li = self.normalize_license_name(li).lower()
-            if "lgpl" in li and not self.allow_lgpl:
-                raise PythonLinkingException(f"{pkg} is licensed under {li} which has unclear implications in the python world")
-            elif "gpl" in li and not self.allow_viral:
-                raise UnidirectionalCodeFlow(f"{pkg} is licensed under {li} which places restrictions in larger works")
-            elif 'unlicense' in li and not self.allow_unlicense:
-                raise InconsistentLicense("Unlicense is not global. It doesn't make sense in some jurisdictions.\n"
-                                          "It's inconsistent. Some of the warranty terms cannot, logically, co-exist.\n"
-                                          "The license is short, clearly expressing intent, at the cost of not carefully addressing common license, copy-right and warranty issues.")
-            elif "public domain" in li:
-                if not self.allow_public_domain:
-                    raise BadLicense("Public domain dedications are not licenses")
-            elif not self.allow_nonfree and not self.allow_unknown:
-                if li not in valid:
-                    raise UnknownLicense(f"{pkg} license unknown, no permissions given")
+            li, category = self.classify_license(li)
+            if not allowed[category]:
+                error, msg = self._ERRORS[category]
+                raise error(msg.format(pkg=pkg, li=li))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+import json
+import re
+import sys
+from importlib.metadata import distribution, PackageNotFoundError
+
+try:
+    from packaging.markers import UndefinedEnvironmentName
+    from packaging.requirements import InvalidRequirement, Requirement
+    from packaging.utils import canonicalize_name
+except ImportError:  # running as a worker inside an environment without packaging, pip always vendors it
+    from pip._vendor.packaging.markers import UndefinedEnvironmentName
+    from pip._vendor.packaging.requirements import InvalidRequirement, Requirement
+    from pip._vendor.packaging.utils import canonicalize_name
+
+# version of the records produced by summary, part of the disk cache key
+FORMAT = 2
+
+# leading project name of a requirement string, used for legacy specifiers that are not valid PEP 508
+_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def summary(name, version, license, requires, environment=None):
+    """ pip show style record, requires are PEP 508 strings evaluated against the given marker environment """
+    environment = dict(environment or {}, extra="")
+    names = []
+    for r in requires or []:
+        try:
+            req = Requirement(r)
+        except InvalidRequirement:
+            # eg. "pytz (>dev)", pip show still lists these, keep the raw name
+            match = _NAME_RE.match(r)
+            dep = canonicalize_name(match.group(1)) if match else None
+            if dep and dep not in names:
+                names.append(dep)
+            continue
+        dep = canonicalize_name(req.name)
+        if dep in names:
+            continue
+        # skip optional requirements, only those pulled by extras declare an "extra" marker
+        try:
+            required = req.marker is None or req.marker.evaluate(environment)
+        except UndefinedEnvironmentName:
+            required = True  # rather check one package too many
+        if required:
+            names.append(dep)
+    if license:
+        # some packages paste the whole license text in this field, like pip show only the first line is kept
+        license = next((line.strip() for line in license.splitlines() if line.strip()), None)
+    data = {"License": license,
+            "Version": version,
+            "Name": name,
+            "Requires": ", ".join(names)}
+    return {k: v for k, v in data.items() if v}
+
+
+def dist_data(dist):
+    """ pip show style summary of an importlib.metadata distribution """
+    md = dist.metadata
+    return summary(md["Name"], md["Version"], md["License"], dist.requires)
+
+
+def package_data(pkg_name):
+    try:
+        return dist_data(distribution(pkg_name))
+    except PackageNotFoundError:
+        return {}
+
+
+def serve():
+    """ answer one package name per line on stdin with one json record per line on stdout
+
+    run with the interpreter whose environment should be inspected, it only depends on the stdlib and packaging
+    """
+    for line in sys.stdin:
+        print(json.dumps(package_data(line.strip())), flush=True)
+
+
+if __name__ == "__main__":
+    serve()
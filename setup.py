@@ -4,6 +4,7 @@ setup(
     name='lichecker',
     version='0.0.1a1',
     packages=['lichecker'],
+    install_requires=['packaging'],
     url='',
     license='BSD3',
     author='jarbasai',
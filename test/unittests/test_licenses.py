@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import patch
+
+from lichecker import DependencyChecker, LicenseChecker, _SPDX_ALIASES
+from lichecker.exception import BadLicense, InconsistentLicense, PythonLinkingException, \
+    UnidirectionalCodeFlow, UnknownLicense
+
+# license string -> (normalized name, category)
+CLASSIFICATIONS = {
+    "MIT": ("mit", "valid"),
+    "MIT License": ("mit", "valid"),
+    "Apache Software License": ("apache-2.0", "valid"),
+    "BSD-3-Clause": ("bsd", "valid"),
+    "ISC license": ("isc", "valid"),
+    "PSF": ("psf", "valid"),
+    "HPND": ("hpnd", "valid"),
+    "MPL 2.0": ("mpl-2.0", "valid"),
+    "Zope Public License": ("zpl", "valid"),
+    "LGPL-3.0-or-later": ("lgpl-3.0-or-later", "lgpl"),
+    "Lesser GNU Public License": ("lgpl", "lgpl"),
+    "GPL-3.0": ("gpl-3.0", "gpl"),
+    "AGPL-3.0": ("agpl-3.0", "gpl"),
+    "The Unlicense (Unlicense)": ("unlicense", "unlicense"),
+    "Public Domain": ("public domain", "public_domain"),
+    "MPL-1.1": ("mpl-1.1", "unknown"),
+    "UNKNOWN": ("unknown", "unknown"),
+    None: ("unknown", "unknown"),
+}
+
+# (license, allow flags, expected exception or None when validation passes)
+DECISIONS = [
+    ("MIT", {}, None),
+    ("MPL 2.0", {}, None),
+    ("Zope Public License", {}, None),
+    ("LGPL-3.0", {}, PythonLinkingException),
+    ("LGPL-3.0", {"allow_lgpl": True}, None),
+    ("GPL-3.0", {}, UnidirectionalCodeFlow),
+    ("GPL-3.0", {"allow_viral": True}, None),
+    ("AGPL-3.0", {}, UnidirectionalCodeFlow),
+    ("AGPL-3.0", {"allow_viral": True}, None),
+    ("GPL-3.0", {"allow_lgpl": True}, UnidirectionalCodeFlow),
+    ("The Unlicense (Unlicense)", {}, InconsistentLicense),
+    ("The Unlicense (Unlicense)", {"allow_unlicense": True}, None),
+    ("Public Domain", {}, None),
+    ("Public Domain", {"allow_public_domain": False}, BadLicense),
+    ("MPL-1.1", {}, UnknownLicense),
+    ("MPL-1.1", {"allow_unknown": True}, None),
+    ("MPL-1.1", {"allow_nonfree": True}, None),
+    (None, {}, UnknownLicense),
+]
+
+
+class TestNormalizeLicenseName(unittest.TestCase):
+    def test_gnu_phrases_are_renamed(self):
+        self.assertEqual(LicenseChecker.normalize_license_name("Lesser GNU Public License"), "LGPL")
+        self.assertEqual(LicenseChecker.normalize_license_name("GNU Public License v3"), "GPL")
+
+    def test_gpl_ids_keep_their_version(self):
+        for li in ("AGPL-3.0", "GPL-3.0-or-later", "LGPL-3.0-or-later", "GPL-2.0", "LGPL-2.1"):
+            self.assertEqual(LicenseChecker.normalize_license_name(li), li)
+
+    def test_permissive_names(self):
+        self.assertEqual(LicenseChecker.normalize_license_name("BSD 3-Clause License"), "BSD")
+        self.assertEqual(LicenseChecker.normalize_license_name("Apache 2.0"), "Apache-2.0")
+        self.assertEqual(LicenseChecker.normalize_license_name("MIT OR Apache-2.0"), "Apache-2.0")
+        self.assertEqual(LicenseChecker.normalize_license_name("ZPL 2.1"), "ZPL")
+        self.assertEqual(LicenseChecker.normalize_license_name("Python Software Foundation License"), "PSF")
+
+
+class TestSpdxAliases(unittest.TestCase):
+    def test_targets_are_normalized(self):
+        # the alias table and the fuzzy path must agree on the name of a license
+        for alias, target in _SPDX_ALIASES.items():
+            with self.subTest(alias=alias):
+                self.assertEqual(LicenseChecker.normalize_license_name(target), target)
+
+    def test_versions_match_fuzzy_path(self):
+        self.assertEqual(LicenseChecker.normalize_license_name("GPLv2"),
+                         LicenseChecker.normalize_license_name("GPL-2.0"))
+        self.assertEqual(LicenseChecker.normalize_license_name("GNU Affero General Public License v3"),
+                         LicenseChecker.normalize_license_name("AGPL-3.0"))
+
+
+class TestClassifyLicense(unittest.TestCase):
+    def test_classifications(self):
+        for li, expected in CLASSIFICATIONS.items():
+            with self.subTest(license=li):
+                self.assertEqual(LicenseChecker.classify_license(li), expected)
+
+
+class TestValidate(unittest.TestCase):
+    def validate(self, li, **flags):
+        data = {"Name": "pkg", "Version": "1.0"}
+        if li:
+            data["License"] = li
+        with patch.object(DependencyChecker, "cache", {"pkg": data}), \
+                patch.object(DependencyChecker, "_primed", True):
+            LicenseChecker("pkg", **flags).validate()
+
+    def test_decisions(self):
+        for li, flags, error in DECISIONS:
+            with self.subTest(license=li, flags=flags):
+                if error is None:
+                    self.validate(li, **flags)
+                else:
+                    with self.assertRaises(error):
+                        self.validate(li, **flags)
+
+    def test_checks_transient_dependencies(self):
+        cache = {"pkg": {"Name": "pkg", "License": "MIT", "Requires": "dep"},
+                 "dep": {"Name": "dep", "License": "GPL-3.0"}}
+        with patch.object(DependencyChecker, "cache", cache), \
+                patch.object(DependencyChecker, "_primed", True):
+            with self.assertRaises(UnidirectionalCodeFlow):
+                LicenseChecker("pkg").validate()
+            # a whitelisted package is trusted with its whole subtree
+            LicenseChecker("pkg", whitelisted_packages=["dep"]).validate()
+            # whitelisting the project itself only skips its own license
+            with self.assertRaises(UnidirectionalCodeFlow):
+                LicenseChecker("pkg", whitelisted_packages=["pkg"]).validate()
+
+    def test_reuses_resolved_tree(self):
+        cache = {"pkg": {"Name": "pkg", "License": "MIT", "Requires": "dep, other"},
+                 "dep": {"Name": "dep", "License": "MIT", "Requires": "sub"},
+                 "other": {"Name": "other", "License": "MIT"},
+                 "sub": {"Name": "sub", "License": "GPL-3.0"}}
+        with patch.object(DependencyChecker, "cache", cache), \
+                patch.object(DependencyChecker, "_primed", True):
+            checker = LicenseChecker("pkg", whitelisted_packages=["dep"])
+            self.assertEqual(set(checker.licenses), {"dep", "other", "sub"})
+            with patch.object(DependencyChecker, "_resolve_package", side_effect=AssertionError("resolved twice")):
+                # the subtree of the whitelisted package is still skipped
+                checker.validate()
+
+    def test_overridden_whitelisted_package_keeps_version(self):
+        cache = {"pkg": {"Name": "pkg", "License": "MIT", "Requires": "dep"},
+                 "dep": {"Name": "dep", "Version": "2.0", "Requires": "sub"},
+                 "sub": {"Name": "sub", "License": "GPL-3.0"}}
+        with patch.object(DependencyChecker, "cache", cache), \
+                patch.object(DependencyChecker, "_primed", True):
+            checker = LicenseChecker("pkg", license_overrides={"dep": "MIT"}, whitelisted_packages=["dep"])
+            self.assertEqual(checker.transient_dependencies, {"dep": []})
+            self.assertEqual(checker.versions, {"dep": "2.0"})
+            self.assertEqual(checker.licenses, {"dep": "MIT"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import PathDistribution
+from pathlib import Path
+from unittest.mock import patch
+
+from lichecker import metadata, DependencyChecker, LicenseChecker
+from lichecker.exception import UnknownLicense
+
+GPL_TEXT = """GNU GENERAL PUBLIC LICENSE
+Version 3, 29 June 2007
+
+Everyone is permitted to copy and distribute verbatim copies
+of this license document, but changing it is not allowed."""
+
+
+def fake_dist(root, name, *headers):
+    info = Path(root, f"{name}-1.0.dist-info")
+    info.mkdir()
+    lines = ["Metadata-Version: 2.1", f"Name: {name}", "Version: 1.0"]
+    for header in headers:
+        key, value = header
+        # continuation lines of a multi line header are indented, like setuptools writes them
+        lines.append(f"{key}: " + "\n        ".join(value.splitlines()))
+    (info / "METADATA").write_text("\n".join(lines) + "\n")
+    return PathDistribution(info)
+
+
+class TestDistData(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_license_text_keeps_first_line(self):
+        dist = fake_dist(self.tmp.name, "gpl-text", ("License", GPL_TEXT))
+        data = metadata.dist_data(dist)
+        self.assertEqual(data["License"], "GNU GENERAL PUBLIC LICENSE")
+        # "permitted" in the body must not make it pass as MIT
+        self.assertEqual(LicenseChecker.classify_license(data["License"])[1], "unknown")
+
+    def test_license_text_fails_validation(self):
+        dist = fake_dist(self.tmp.name, "gpl-text", ("License", GPL_TEXT))
+        with patch.object(DependencyChecker, "cache", {"gpl-text": metadata.dist_data(dist)}), \
+                patch.object(DependencyChecker, "_primed", True):
+            with self.assertRaises(UnknownLicense):
+                LicenseChecker("gpl-text").validate()
+
+    def test_pip_inspect_license_keeps_first_line(self):
+        data = metadata.summary("gpl-text", "1.0", GPL_TEXT, [])
+        self.assertEqual(data["License"], "GNU GENERAL PUBLIC LICENSE")
+
+
+class TestInvalidRequirements(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dist = fake_dist(self.tmp.name, "bad", ("Requires-Dist", "pytz (>dev)"), ("Requires-Dist", "six"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_legacy_requirement_keeps_raw_name(self):
+        self.assertEqual(metadata.dist_data(self.dist)["Requires"], "pytz, six")
+
+    def test_sweep_survives_bad_dist(self):
+        with patch.object(DependencyChecker, "cache", {}), \
+                patch.object(DependencyChecker, "_primed", False), \
+                patch.object(DependencyChecker, "disk_cache", None), \
+                patch("lichecker.distributions", return_value=[self.dist]):
+            self.assertEqual(DependencyChecker.get_direct_dependencies("bad"), ["pytz", "six"])
+
+    def test_undefined_marker_keeps_requirement(self):
+        with patch("packaging.markers.Marker.evaluate", side_effect=metadata.UndefinedEnvironmentName("python_version")):
+            data = metadata.summary("bad", "1.0", None, ["six; python_version < '4'", "pytz"])
+        self.assertEqual(data["Requires"], "six, pytz")
+
+    def test_worker_survives_bad_dist(self):
+        env = dict(os.environ, PYTHONPATH=self.tmp.name)
+        out = subprocess.run([sys.executable, metadata.__file__], input="bad\nnot-installed\n",
+                             capture_output=True, text=True, env=env, check=True).stdout
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(records[0]["Requires"], "pytz, six")
+        self.assertEqual(records[1], {})
+
+
+class TestMemoization(unittest.TestCase):
+    def test_empty_tree_is_walked_once(self):
+        with patch.object(DependencyChecker, "cache", {"leaf": {"Name": "leaf", "Version": "1.0"}}), \
+                patch.object(DependencyChecker, "_primed", True):
+            checker = DependencyChecker("leaf")
+            self.assertEqual(checker.transient_dependencies, {})
+            with patch.object(DependencyChecker, "_walk", side_effect=AssertionError("walked twice")):
+                self.assertEqual(checker.transient_dependencies, {})
+                self.assertEqual(checker.versions, {})
+
+    def test_missing_package_is_looked_up_once(self):
+        with patch.object(DependencyChecker, "get_package_data", return_value={}) as lookup:
+            checker = DependencyChecker("missing")
+            self.assertIsNone(checker.license)
+            self.assertIsNone(checker.version)
+            self.assertEqual(checker.dependencies, [])
+        lookup.assert_called_once()
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, "cache", "metadata.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        entries = {"six": {"Name": "six", "Version": "1.0", "License": "MIT"}}
+        with patch.object(DependencyChecker, "disk_cache", self.db):
+            DependencyChecker._save_disk_cache("key", entries)
+            self.assertEqual(DependencyChecker._load_disk_cache("key"), entries)
+            self.assertEqual(DependencyChecker._load_disk_cache("other"), {})
+
+    def test_site_key_follows_sys_path(self):
+        key = DependencyChecker._site_key()
+        extra = os.path.join(self.tmp.name, "extra")
+        os.mkdir(extra)
+        with patch.object(sys, "path", sys.path + [extra]):
+            with_extra = DependencyChecker._site_key()
+            self.assertNotEqual(key, with_extra)
+            # a new dist in a PYTHONPATH entry changes its mtime
+            os.utime(extra, (0, 0))
+            self.assertNotEqual(with_extra, DependencyChecker._site_key())
+
+    def test_site_key_follows_record_format(self):
+        key = DependencyChecker._site_key()
+        with patch.object(metadata, "FORMAT", metadata.FORMAT + 1):
+            self.assertNotEqual(key, DependencyChecker._site_key())
+
+
+class TestMetadataWorkers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for i in range(8):
+            fake_dist(self.tmp.name, f"pkg{i}", ("License", "MIT"))
+        self.patches = [patch.object(DependencyChecker, "python", sys.executable),
+                        patch.object(DependencyChecker, "_idle_workers", queue.Queue()),
+                        patch.object(DependencyChecker, "_worker_count", 0),
+                        patch.dict(os.environ, PYTHONPATH=self.tmp.name)]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        while not DependencyChecker._idle_workers.empty():
+            worker = DependencyChecker._idle_workers.get()
+            if worker is None:
+                continue
+            worker.stdin.close()
+            worker.wait()
+            worker.stdout.close()
+        for p in reversed(self.patches):
+            p.stop()
+        self.tmp.cleanup()
+
+    def test_concurrent_queries_use_a_bounded_pool(self):
+        names = [f"pkg{i}" for i in range(8)] * 4
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(DependencyChecker._query_worker, names))
+        self.assertEqual([r["Name"] for r in results], names)
+        self.assertLessEqual(DependencyChecker._worker_count, DependencyChecker.max_workers)
+        self.assertEqual(DependencyChecker._idle_workers.qsize(), DependencyChecker._worker_count)
+
+    def test_python_is_not_overridden_per_class(self):
+        with patch.object(LicenseChecker, "python", "/nonexistent/python", create=True):
+            with self.assertRaises(ValueError):
+                LicenseChecker("pkg0")
+
+    def test_broken_interpreter_raises(self):
+        with patch.object(DependencyChecker, "python", "/bin/false"), ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(DependencyChecker._query_worker, f"pkg{i}") for i in range(8)]
+            for future in futures:
+                self.assertIsInstance(future.exception(timeout=30), RuntimeError)
+        self.assertEqual(DependencyChecker._worker_count, 0)
+
+
+class TestFetchOnce(unittest.TestCase):
+    def test_concurrent_and_missing_lookups_fetch_once(self):
+        calls = []
+
+        def fetch(pkg_name):
+            calls.append(pkg_name)
+            return {}
+
+        with patch.object(DependencyChecker, "cache", {}), patch.object(DependencyChecker, "_inflight", {}):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda p: DependencyChecker._fetch_once(p, fetch), ["missing"] * 32))
+            self.assertEqual(results, [{}] * 32)
+            self.assertEqual(DependencyChecker._fetch_once("missing", fetch), {})
+        self.assertEqual(calls, ["missing"])
+
+
+if __name__ == "__main__":
+    unittest.main()